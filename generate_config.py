@@ -1,35 +1,105 @@
 #!/usr/bin/env python3
 
+import functools
+import gzip
+import io
 import json
 import urllib.parse
 import argparse
 import sys
 import os
-import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, BinaryIO, List, Optional, Tuple
+
+# orjson is an optional accelerator. Unlike stdlib json it parses integers
+# beyond 64 bits as floats and rejects NaN/Infinity, neither of which appears
+# in sing-box configs, so that difference is accepted.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+def _json_loads(data: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(obj: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+    return json.dumps(obj, indent=2, ensure_ascii=False)
+
+def _json_dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+def _json_dump_binary(obj: Any, f: BinaryIO) -> None:
+    if orjson is not None:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    text_writer = io.TextIOWrapper(f, encoding='utf-8')
+    try:
+        json.dump(obj, text_writer, indent=2, ensure_ascii=False)
+    finally:
+        # Flush and hand the binary stream back to the caller without closing it
+        text_writer.detach()
 
-def parse_vless_url(vless_url: str) -> Dict[str, Any]:
+@functools.lru_cache(maxsize=128)
+def _parse_vless_url_cached(vless_url: str) -> Tuple[str, str, str, int, Tuple[Tuple[str, str], ...]]:
     if not vless_url.startswith('vless://'):
         raise ValueError("URL must start with 'vless://'")
 
     url_without_prefix = vless_url[8:]
-    parts = url_without_prefix.split('#')
-    name = urllib.parse.unquote(parts[1]) if len(parts) > 1 else "VLESS Server"
-    main_part, params_part = parts[0].split('?', 1)
-    uuid_and_server = main_part.split('@')
-    uuid = uuid_and_server[0]
-    server_and_port = uuid_and_server[1].split(':')
-    server = server_and_port[0]
-    port = int(server_and_port[1]) if len(server_and_port) > 1 else 443
-    params = urllib.parse.parse_qs(params_part)
-
-    processed_params = {}
-    for key, value in params.items():
-        if isinstance(value, list) and len(value) == 1:
-            processed_params[key] = value[0]
-        else:
-            processed_params[key] = value
-    params = processed_params
+    frag_idx = url_without_prefix.find('#')
+    if frag_idx == -1:
+        main = url_without_prefix
+        name = "VLESS Server"
+    else:
+        main = url_without_prefix[:frag_idx]
+        name = url_without_prefix[frag_idx + 1:]
+        if '%' in name:
+            name = urllib.parse.unquote(name)
+
+    q_idx = main.find('?')
+    if q_idx == -1:
+        q_idx = len(main)
+    at_idx = main.find('@', 0, q_idx)
+    if at_idx == -1:
+        raise ValueError("URL must contain 'uuid@server'")
+    uuid = main[:at_idx]
+    colon_idx = main.rfind(':', at_idx, q_idx)
+    if colon_idx == -1:
+        server = main[at_idx + 1:q_idx]
+        port = 443
+    else:
+        server = main[at_idx + 1:colon_idx]
+        port = int(main[colon_idx + 1:q_idx])
+
+    params = {}
+    query = main[q_idx + 1:]
+    if query:
+        for kv in query.split('&'):
+            key, _, value = kv.partition('=')
+            # Match parse_qs: blank values are dropped and '+' decodes to a space
+            if not value:
+                continue
+            if '%' in key or '+' in key:
+                key = urllib.parse.unquote_plus(key)
+            if '%' in value or '+' in value:
+                value = urllib.parse.unquote_plus(value)
+            params[key] = value
+
+    return name, uuid, server, port, tuple(params.items())
+
+def parse_vless_url(vless_url: str) -> Dict[str, Any]:
+    # Results are cached as tuples, rebuild the mutable dicts for every caller
+    name, uuid, server, port, param_items = _parse_vless_url_cached(vless_url)
+    params = dict(param_items)
 
     return {
         'name': name,
@@ -51,10 +121,10 @@ def parse_vless_url(vless_url: str) -> Dict[str, Any]:
         'all_params': params
     }
 
-def sanitize_filename(name: str) -> str:
-    """Convert server name to valid filename"""
-    # Remove or replace invalid characters for filename
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', name)
+_FILENAME_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+_FILENAME_BAD = re2.compile(r'[<>:"/\\|?*]') if re2 is not None else None
+
+def _finish_filename(sanitized: str) -> str:
     # Remove leading/trailing whitespace and dots
     sanitized = sanitized.strip(' .')
     # Limit length
@@ -65,21 +135,56 @@ def sanitize_filename(name: str) -> str:
         sanitized = "vless_config"
     return sanitized + ".json"
 
+def sanitize_filename(name: str) -> str:
+    """Convert server name to valid filename"""
+    # Remove or replace invalid characters for filename
+    return _finish_filename(name.translate(_FILENAME_TRANS))
+
+def sanitize_filenames_batch(names: List[str]) -> List[str]:
+    """Convert many server names to valid filenames, using re2 when installed"""
+    if _FILENAME_BAD is None:
+        return [sanitize_filename(name) for name in names]
+    sub = _FILENAME_BAD.sub
+    return [_finish_filename(sub('_', name)) for name in names]
+
+@functools.lru_cache(maxsize=8)
+def _read_template_cached(template_path: str, mtime: float) -> str:
+    with open(template_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 def load_template(template_path: str) -> Dict[str, Any]:
     try:
-        with open(template_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        mtime = os.path.getmtime(template_path)
+        # Only the text is cached, every caller gets a freshly parsed dict to mutate
+        template = _json_loads(_read_template_cached(template_path, mtime))
     except FileNotFoundError:
         raise FileNotFoundError(f"Template file not found: {template_path}")
     except json.JSONDecodeError as e:
         raise ValueError(f"JSON template parsing error: {e}")
 
+    # Constant-time shape check so update_vless_outbound can index directly,
+    # its own lookup reports a missing vless entry
+    if not isinstance(template, dict):
+        raise ValueError("JSON template must be an object")
+    if 'outbounds' not in template:
+        raise ValueError("VLESS outbound not found in template")
+    return template
+
+_REALITY_TLS_KEYS = frozenset(('enabled', 'server_name', 'utls', 'reality'))
+_UTLS_KEYS = frozenset(('enabled', 'fingerprint'))
+_REALITY_KEYS = frozenset(('enabled', 'public_key', 'short_id'))
+
+def _is_plain_reality_tls(tls_config: Optional[Dict[str, Any]]) -> bool:
+    """Check that the template TLS block has no keys the reality fast path would drop"""
+    if tls_config is None:
+        return True
+    return (tls_config.keys() <= _REALITY_TLS_KEYS
+            and tls_config.get('utls', {}).keys() <= _UTLS_KEYS
+            and tls_config.get('reality', {}).keys() <= _REALITY_KEYS)
+
 def update_vless_outbound(config: Dict[str, Any], vless_params: Dict[str, Any]) -> None:
-    vless_outbound = None
-    for outbound in config.get('outbounds', []):
-        if outbound.get('type') == 'vless':
-            vless_outbound = outbound
-            break
+    vless_outbound = next(
+        (o for o in config['outbounds'] if o.get('type') == 'vless'), None)
 
     if not vless_outbound:
         raise ValueError("VLESS outbound not found in template")
@@ -91,6 +196,23 @@ def update_vless_outbound(config: Dict[str, Any], vless_params: Dict[str, Any])
     if vless_params['flow']:
         vless_outbound['flow'] = vless_params['flow']
 
+    # Fast path for the common tcp + reality link carrying every reality field
+    if (vless_params['security'] == 'reality' and vless_params['type'] == 'tcp'
+            and vless_params['sni'] and vless_params['fp']
+            and vless_params['pbk'] and vless_params['sid']
+            and _is_plain_reality_tls(vless_outbound.get('tls'))):
+        vless_outbound['tls'] = {
+            'enabled': True,
+            'server_name': vless_params['sni'],
+            'utls': {'enabled': True, 'fingerprint': vless_params['fp']},
+            'reality': {
+                'enabled': True,
+                'public_key': vless_params['pbk'],
+                'short_id': vless_params['sid'],
+            },
+        }
+        return
+
     if vless_params['security'] == 'reality':
         tls_config = vless_outbound.setdefault('tls', {})
         tls_config['enabled'] = True
@@ -140,18 +262,29 @@ def update_vless_outbound(config: Dict[str, Any], vless_params: Dict[str, Any])
             grpc_config = transport_config.setdefault('grpc', {})
             grpc_config['service_name'] = vless_params['path']
 
-def generate_config(template_path: str, vless_url: str, output_path: Optional[str] = None) -> str:
+def _parse_vless_url_checked(vless_url: str) -> Dict[str, Any]:
     try:
-        vless_params = parse_vless_url(vless_url)
-        print(f"Successfully parsed VLESS URL for server: {vless_params['name']}")
-        print(f"  Server: {vless_params['server']}:{vless_params['port']}")
-        print(f"  UUID: {vless_params['uuid']}")
-        print(f"  Security: {vless_params['security']}")
-        if vless_params['sni']:
-            print(f"  SNI: {vless_params['sni']}")
+        return parse_vless_url(vless_url)
     except Exception as e:
         raise ValueError(f"VLESS URL parsing error: {e}")
 
+def generate_config(template_path: str, vless_url: str, output_path: Optional[str] = None) -> Optional[str]:
+    vless_params = _parse_vless_url_checked(vless_url)
+    return generate_config_from_params(template_path, vless_params, output_path)
+
+def generate_config_bytes(template_path: str, vless_url: str) -> bytes:
+    """Build the configuration as UTF-8 JSON bytes, e.g. for json2bpf profiles"""
+    vless_params = _parse_vless_url_checked(vless_url)
+    return _json_dumps_bytes(_build_config(template_path, vless_params))
+
+def _build_config(template_path: str, vless_params: Dict[str, Any]) -> Dict[str, Any]:
+    print(f"Successfully parsed VLESS URL for server: {vless_params['name']}")
+    print(f"  Server: {vless_params['server']}:{vless_params['port']}")
+    print(f"  UUID: {vless_params['uuid']}")
+    print(f"  Security: {vless_params['security']}")
+    if vless_params['sni']:
+        print(f"  SNI: {vless_params['sni']}")
+
     config = load_template(template_path)
     print(f"Loaded template: {template_path}")
 
@@ -161,20 +294,29 @@ def generate_config(template_path: str, vless_url: str, output_path: Optional[st
     except Exception as e:
         raise ValueError(f"Configuration update error: {e}")
 
-    config_json = json.dumps(config, indent=2, ensure_ascii=False)
+    return config
 
-    if output_path:
-        try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(config_json)
-            print(f"Configuration saved to: {output_path}")
-        except Exception as e:
-            raise IOError(f"File saving error: {e}")
+def generate_config_from_params(template_path: str, vless_params: Dict[str, Any],
+                                output_path: Optional[str] = None) -> Optional[str]:
+    config = _build_config(template_path, vless_params)
 
-    return config_json
+    if not output_path:
+        return _json_dumps(config)
 
-def main():
-    """Main function"""
+    try:
+        with open(output_path, 'wb') as f:
+            if output_path.endswith('.gz'):
+                with gzip.GzipFile(fileobj=f, mode='wb') as gzip_writer:
+                    _json_dump_binary(config, gzip_writer)
+            else:
+                _json_dump_binary(config, f)
+        print(f"Configuration saved to: {output_path}")
+    except Exception as e:
+        raise IOError(f"File saving error: {e}")
+
+    return None
+
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='sing-box configuration generator from VLESS URL',
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -197,7 +339,13 @@ def main():
         help='Path for saving configuration (default: auto-generate from server name)'
     )
 
-    args = parser.parse_args()
+    return parser
+
+_PARSER = _build_parser()
+
+def main():
+    """Main function"""
+    args = _PARSER.parse_args()
 
     template_path = args.template
     if not template_path:
@@ -209,12 +357,10 @@ def main():
         sys.exit(1)
 
     try:
-        output_path = args.output
-        if not output_path:
-            vless_params = parse_vless_url(args.url)
-            output_path = sanitize_filename(vless_params['name'])
+        vless_params = _parse_vless_url_checked(args.url)
+        output_path = args.output or sanitize_filename(vless_params['name'])
 
-        generate_config(template_path, args.url, output_path)
+        generate_config_from_params(template_path, vless_params, output_path)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
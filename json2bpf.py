@@ -3,7 +3,10 @@ import struct
 import gzip
 import io
 import argparse
+import os
 import sys
+import time
+from typing import Union
 
 
 class ProfileContent:
@@ -15,7 +18,7 @@ class ProfileContent:
     def __init__(self,
                  name: str,
                  profile_type: int,
-                 config: str,
+                 config: Union[str, bytes],
                  remote_path: str = "",
                  auto_update: bool = False,
                  auto_update_interval: int = 0,
@@ -29,47 +32,61 @@ class ProfileContent:
         self.last_updated = last_updated
 
 
-def write_uvarint(writer: io.BytesIO, value: int) -> int:
+_I32 = struct.Struct('>i')
+_I64 = struct.Struct('>q')
+_BOOL = struct.Struct('?')
+
+_PROFILE_HEADER = bytes((ProfileContent.MESSAGE_TYPE_PROFILE_CONTENT, 1))
+
+
+def write_uvarint(buf: bytearray, value: int) -> int:
+    if value < 0x80:
+        buf.append(value)
+        return 1
     written = 0
     while value >= 0x80:
-        writer.write(struct.pack('B', (value & 0x7F) | 0x80))
+        buf.append((value & 0x7F) | 0x80)
         value >>= 7
         written += 1
-    writer.write(struct.pack('B', value & 0x7F))
+    buf.append(value)
     return written + 1
 
 
-def write_varbin_string(writer: io.BytesIO, value: str) -> None:
+def write_varbin_string(buf: bytearray, value: str) -> None:
     encoded = value.encode('utf-8')
-    length = len(encoded)
-    write_uvarint(writer, length)
-    if length > 0:
-        writer.write(encoded)
+    write_uvarint(buf, len(encoded))
+    buf += encoded
 
 def encode_profile_content(profile: ProfileContent) -> bytes:
     buffer = io.BytesIO()
-    buffer.write(struct.pack('B', ProfileContent.MESSAGE_TYPE_PROFILE_CONTENT))
-    buffer.write(struct.pack('B', 1))
-    compressed_buffer = io.BytesIO()
-
-    with gzip.GzipFile(fileobj=compressed_buffer, mode='wb') as gzip_writer:
-        inner_buffer = io.BytesIO()
-        write_varbin_string(inner_buffer, profile.name)
-        inner_buffer.write(struct.pack('>i', profile.type))
-        write_varbin_string(inner_buffer, profile.config)
+    buffer.write(_PROFILE_HEADER)
+
+    # Compress field by field so the config is never copied into an inner buffer
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as gzip_writer:
+        head = bytearray()
+        write_varbin_string(head, profile.name)
+        head += _I32.pack(profile.type)
+        encoded_config = profile.config
+        if isinstance(encoded_config, str):
+            encoded_config = encoded_config.encode('utf-8')
+        write_uvarint(head, len(encoded_config))
+        gzip_writer.write(head)
+        gzip_writer.write(encoded_config)
+
+        tail = bytearray()
         if profile.type != ProfileContent.PROFILE_TYPE_LOCAL:
-            write_varbin_string(inner_buffer, profile.remote_path)
+            write_varbin_string(tail, profile.remote_path)
         if profile.type == ProfileContent.PROFILE_TYPE_REMOTE:
-            inner_buffer.write(struct.pack('?', profile.auto_update))
-            inner_buffer.write(struct.pack('>i', profile.auto_update_interval))
-            inner_buffer.write(struct.pack('>q', profile.last_updated))
-        gzip_writer.write(inner_buffer.getvalue())
-    buffer.write(compressed_buffer.getvalue())
+            tail += _BOOL.pack(profile.auto_update)
+            tail += _I32.pack(profile.auto_update_interval)
+            tail += _I64.pack(profile.last_updated)
+        if tail:
+            gzip_writer.write(tail)
 
     return buffer.getvalue()
 
 
-def create_local_profile(name: str, config: str) -> ProfileContent:
+def create_local_profile(name: str, config: Union[str, bytes]) -> ProfileContent:
     return ProfileContent(
         name=name,
         profile_type=ProfileContent.PROFILE_TYPE_LOCAL,
@@ -77,7 +94,7 @@ def create_local_profile(name: str, config: str) -> ProfileContent:
     )
 
 
-def create_remote_profile(name: str, config: str, remote_path: str,
+def create_remote_profile(name: str, config: Union[str, bytes], remote_path: str,
                          auto_update: bool = False,
                          auto_update_interval: int = 3600,
                          last_updated: int = 0) -> ProfileContent:
@@ -92,7 +109,7 @@ def create_remote_profile(name: str, config: str, remote_path: str,
     )
 
 
-def create_icloud_profile(name: str, config: str, remote_path: str) -> ProfileContent:
+def create_icloud_profile(name: str, config: Union[str, bytes], remote_path: str) -> ProfileContent:
     return ProfileContent(
         name=name,
         profile_type=ProfileContent.PROFILE_TYPE_ICLOUD,
@@ -101,7 +118,7 @@ def create_icloud_profile(name: str, config: str, remote_path: str) -> ProfileCo
     )
 
 
-def main():
+def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description="Encode ProfileContent to binary format matching Go sing-box implementation"
     )
@@ -173,7 +190,14 @@ def main():
         help="Output file path (default: stdout as hex)"
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+_PARSER = _build_parser()
+
+
+def main():
+    args = _PARSER.parse_args()
 
     remote_path = args.remote_path or args.remotepath or ""
     auto_update = args.auto_update or args.autoupdate
@@ -186,17 +210,18 @@ def main():
 
     config_content = args.config
     config_file_path = None
-    try:
-        if config_content.startswith(("./", "/", "~/")) or config_content.endswith(".json"):
+    looks_like_path = len(config_content) < 4096 and (
+        config_content.startswith(("./", "/", "~/")) or config_content.endswith(".json"))
+    if looks_like_path:
+        try:
             config_file_path = config_content
             with open(config_content, "r", encoding="utf-8") as f:
                 config_content = f.read()
-    except (FileNotFoundError, PermissionError):
-        pass
+        except (FileNotFoundError, PermissionError):
+            pass
 
     profile_name = args.name
     if not profile_name and config_file_path:
-        import os
         profile_name = os.path.splitext(os.path.basename(config_file_path))[0]
 
     if not profile_name:
@@ -206,7 +231,6 @@ def main():
     if args.type == "local":
         profile = create_local_profile(profile_name, config_content)
     elif args.type == "remote":
-        import time
         profile = create_remote_profile(
             name=profile_name,
             config=config_content,
@@ -227,7 +251,6 @@ def main():
     if args.output:
         output_path = args.output
     elif config_file_path:
-        import os
         base_name = os.path.splitext(config_file_path)[0]
         output_path = base_name + ".bpf"
     else: